@@ -0,0 +1,125 @@
+#!/usr/bin/env python3
+"""Sanity-check the precompiled library packages before publishing.
+
+Walks the zip packages produced by build_precompiled_libs.py and checks
+that each one is a readable archive with the expected lib/ and include/
+layout. Meant to run in CI right after the packaging step.
+"""
+
+import argparse
+import functools
+import os
+import sys
+import zipfile
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
+
+# Route zipfile's inflate/crc32 through ISA-L's SIMD implementations
+# when python-isal is installed; the deep CRC check decompresses every
+# byte of every package, so this is where the cycles go.
+try:
+    from isal import isal_zlib as _isal_zlib
+    zipfile.zlib = _isal_zlib
+except ImportError:
+    pass
+
+ROOT_DIR = Path(__file__).resolve().parent.parent
+PACKAGE_DIR = ROOT_DIR / "precompiled_packages"
+
+
+def test_package(package_path, deep=False):
+    """Validate one package; returns True when it passes.
+
+    ``deep`` additionally CRC-checks every entry, decompressing the whole
+    archive - worthwhile before a release, too slow for every CI run.
+
+    Packages lay entries out as <platform>/lib/... and
+    <platform>/include/..., so the layout check looks at the second path
+    segment. The walk stops as soon as the questions are answered; the
+    central directory is parsed on open either way, but the per-entry
+    checks need not visit every name.
+    """
+    package_path = Path(package_path)
+    print(f"[INFO] Checking {package_path.name}...")
+    try:
+        with zipfile.ZipFile(package_path) as zipf:
+            count = 0
+            has_lib = False
+            has_include = False
+            samples = []
+            for info in zipf.infolist():
+                count += 1
+                name = info.filename
+                if len(samples) < 10:
+                    samples.append(name)
+                parts = name.split("/")
+                section = parts[1] if len(parts) > 1 else ""
+                if not has_lib and section == "lib":
+                    has_lib = True
+                if not has_include and section == "include":
+                    has_include = True
+                if has_lib and has_include and count > 10:
+                    break
+    except (OSError, zipfile.BadZipFile) as e:
+        print(f"[ERROR] {package_path.name}: unreadable archive ({e})")
+        return False
+
+    if count == 0:
+        print(f"[ERROR] {package_path.name}: empty archive")
+        return False
+    problems = []
+    if not has_lib:
+        problems.append("no lib/ entries")
+    if not has_include:
+        problems.append("no include/ entries")
+    if problems:
+        print(f"[ERROR] {package_path.name}: {', '.join(problems)}")
+        for name in samples:
+            print(f"    {name}")
+        return False
+
+    if deep:
+        with zipfile.ZipFile(package_path) as zipf:
+            bad = zipf.testzip()
+        if bad is not None:
+            print(f"[ERROR] {package_path.name}: CRC mismatch in {bad}")
+            return False
+        print(f"[OK] {package_path.name} passed CRC verification")
+        return True
+
+    print(f"[OK] {package_path.name} looks sound")
+    return True
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Validate precompiled library packages")
+    parser.add_argument("packages", nargs="*", type=Path,
+                        help="Packages to check (default: all in "
+                             f"{PACKAGE_DIR})")
+    parser.add_argument("--deep", action="store_true",
+                        help="Also CRC-check every entry (slow)")
+    args = parser.parse_args()
+
+    packages = args.packages or sorted(PACKAGE_DIR.glob("lupine-libs-*.zip"))
+    if not packages:
+        print(f"[ERROR] No packages found in {PACKAGE_DIR}")
+        sys.exit(1)
+
+    # The checks are independent and bound by central-directory I/O, so
+    # run one worker process per package (capped at the core count).
+    check = functools.partial(test_package, deep=args.deep)
+    workers = min(len(packages), os.cpu_count() or 1)
+    if workers > 1:
+        with ProcessPoolExecutor(max_workers=workers) as executor:
+            results = list(executor.map(check, packages))
+    else:
+        results = [check(p) for p in packages]
+    success_count = sum(results)
+
+    print(f"[INFO] {success_count}/{len(packages)} packages passed")
+    sys.exit(0 if success_count == len(packages) else 1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,1685 @@
+#!/usr/bin/env python3
+"""
+Lupine Game Engine - Build Environment Setup
+
+Sets up a complete development environment for building the engine on
+Windows, macOS and Linux: system packages, Qt, Emscripten, precompiled
+third-party libraries and the generated CMake platform configuration.
+
+Usage:
+    python setup_build_environment.py [--force] [--no-qt] [--verify-only] [--skip-build]
+"""
+
+import argparse
+import functools
+import hashlib
+import json
+import os
+import platform
+import shutil
+import subprocess
+import sys
+import time
+import threading
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from pathlib import Path
+
+
+# orjson serializes and parses severalfold faster than the stdlib; the
+# manifests are the only JSON on a hot path, so they go through these
+# wrappers and everything else keeps plain json.
+try:
+    import orjson
+
+    def _json_dump_bytes(obj):
+        return orjson.dumps(obj, option=orjson.OPT_INDENT_2)
+
+    _json_loads = orjson.loads
+except ImportError:
+    def _json_dump_bytes(obj):
+        return json.dumps(obj, indent=2).encode()
+
+    _json_loads = json.loads
+
+# The bundled export libraries only differ per platform in naming
+# convention, so build the manifest once at import time from a single
+# canonical stem list and keep the serialized form as a constant.
+_LIB_STEMS = [
+    "SDL2", "SDL2_image", "SDL2_ttf", "SDL2_mixer", "glad", "lua",
+    "yaml-cpp", "box2d", "assimp", "spdlog", "fmt", "pugixml",
+]
+
+_LIBRARY_MANIFEST_BYTES = _json_dump_bytes({
+    "version": "1.0.0",
+    "platforms": {
+        "windows": {"libraries": [f"{stem}.lib" for stem in _LIB_STEMS]},
+        "linux": {"libraries": [f"lib{stem}.a" for stem in _LIB_STEMS]},
+        "macosx": {"libraries": [f"lib{stem}.a" for stem in _LIB_STEMS]},
+        "macarm64": {"libraries": [f"lib{stem}.a" for stem in _LIB_STEMS]},
+    },
+})
+
+# Rough relative build cost per vcpkg port, used to schedule the slowest
+# builds first so pool workers stay busy until the longest one finishes
+# (longest-processing-time-first). Unknown ports default to 10.
+_INSTALL_COST = {
+    "assimp": 60, "bullet3": 50, "python3": 50, "sdl2": 30,
+    "libjpeg-turbo": 25, "freetype": 25, "spdlog": 20, "yaml-cpp": 20,
+    "sdl2-mixer": 15, "sdl2-image": 15, "sdl2-ttf": 15, "box2d": 15,
+    "glm": 5, "glad": 5, "nlohmann-json": 5, "zlib": 5,
+}
+
+
+@functools.lru_cache(maxsize=None)
+def _which(command):
+    """Memoized shutil.which: each raw call stats every PATH entry, and
+    the same handful of tools are probed many times per run."""
+    return shutil.which(command)
+
+
+@functools.lru_cache(maxsize=4)
+def _load_manifest(path, mtime_ns):
+    """Parse a manifest file once per on-disk version.
+
+    The mtime key makes the cache self-invalidating: a rewritten manifest
+    gets a new key, repeated probes of an unchanged one are free.
+    """
+    try:
+        return _json_loads(Path(path).read_bytes())
+    except (OSError, ValueError):
+        return None
+
+
+class BuildEnvironmentSetup:
+    """Drives the full build-environment setup for the current platform."""
+
+    # Export target platforms and the vcpkg triplet each one builds for.
+    _EXPORT_TARGETS = {
+        "windows": "x64-windows-static",
+        "linux": "x64-linux",
+        "macosx": "x64-osx",
+        "macarm64": "arm64-osx",
+    }
+
+    def __init__(self, force=False, no_qt=False, skip_build=False,
+                 cross_libs=False):
+        self.root_dir = Path(__file__).parent.absolute()
+        self.thirdparty_dir = self.root_dir / "thirdparty"
+        self.force = force
+        self.no_qt = no_qt
+        self.skip_build = skip_build
+        self.cross_libs = cross_libs
+        self.system_info = self._detect_system()
+        self._print_lock = threading.Lock()
+        # Persistent binary cache so repeat setups reuse previously built
+        # vcpkg artifacts instead of recompiling every port.
+        # VCPKG_DEFAULT_BINARY_CACHE is vcpkg's own knob for this and wins
+        # when set so the script agrees with any external vcpkg usage.
+        default_cache = os.environ.get("VCPKG_DEFAULT_BINARY_CACHE")
+        if default_cache:
+            self.cache_dir = Path(default_cache)
+        else:
+            self.cache_dir = Path(
+                os.environ.get("LUPINE_CACHE",
+                               Path.home() / ".cache" / "lupine")
+            ) / "vcpkg-bincache"
+        self.cache_dir.mkdir(parents=True, exist_ok=True)
+        self._path_entries = tuple(
+            p for p in os.environ.get("PATH", "").split(os.pathsep) if p
+        )
+        # Markers of a usable Qt install for this platform, resolved once
+        # here instead of re-branching on the system per candidate dir,
+        # and grouped by directory so each group costs one scandir.
+        if self.system_info["system"] == "windows":
+            self._qt_indicators = {
+                "bin": {"qmake.exe"},
+                "lib": {"Qt6Core.lib"},
+                "lib/cmake": {"Qt6"},
+            }
+        elif self.system_info["system"] == "macos":
+            self._qt_indicators = {
+                "bin": {"qmake"},
+                "lib": {"QtCore.framework"},
+                "lib/cmake": {"Qt6"},
+            }
+        else:
+            self._qt_indicators = {
+                "bin": {"qmake"},
+                "lib": {"libQt6Core.so", "libQt6Core.a"},
+                "lib/cmake": {"Qt6"},
+            }
+
+    # ------------------------------------------------------------------
+    # System detection and helpers
+    # ------------------------------------------------------------------
+
+    def _detect_system(self):
+        """Detect OS/architecture and derive platform directory + vcpkg triplet."""
+        # sys.platform is a compile-time constant; platform.system() goes
+        # through uname (and can shell out on exotic interpreters), which
+        # is wasted work on every setup instantiation. platform.machine()
+        # is only needed to disambiguate Apple silicon, so defer it to the
+        # darwin branch.
+        if sys.platform.startswith("win"):
+            info = {
+                "system": "windows",
+                "arch": "x64",
+                "platform_dir": "windows",
+                "triplet": "x64-windows-static",
+            }
+        elif sys.platform == "darwin":
+            if platform.machine().lower() in ("arm64", "aarch64"):
+                info = {
+                    "system": "macos",
+                    "arch": "arm64",
+                    "platform_dir": "macarm64",
+                    "triplet": "arm64-osx",
+                }
+            else:
+                info = {
+                    "system": "macos",
+                    "arch": "x64",
+                    "platform_dir": "macosx",
+                    "triplet": "x64-osx",
+                }
+        elif sys.platform.startswith("linux"):
+            info = {
+                "system": "linux",
+                "arch": "x64",
+                "platform_dir": "linux",
+                "triplet": "x64-linux",
+            }
+        else:
+            print(f"[ERROR] Unsupported system: {sys.platform}")
+            sys.exit(1)
+
+        print(f"[INFO] Detected system: {info['system']} ({info['arch']})")
+        return info
+
+    @functools.cached_property
+    def _build_env(self):
+        """Environment for build-tool children, with parallelism defaults.
+
+        MAKEFLAGS and CMAKE_BUILD_PARALLEL_LEVEL make any nested make or
+        cmake invocation (vcpkg port builds, aqt's tool steps) use every
+        core without each call site threading -j through by hand.
+        """
+        jobs = str(os.cpu_count() or 4)
+        return dict(os.environ,
+                    MAKEFLAGS=f"-j{jobs}",
+                    CMAKE_BUILD_PARALLEL_LEVEL=jobs)
+
+    def _run_command(self, cmd, cwd=None, check=True, capture=False, env=None,
+                     quiet=False, log_path=None):
+        """Run a command, optionally capturing, discarding or logging output.
+
+        ``quiet`` discards stdout/stderr entirely; ``log_path`` routes them to
+        a file without any Python-side decoding. Both avoid serializing chatty
+        children on the parent's tty, which matters under the thread pools.
+        """
+        try:
+            if capture:
+                result = subprocess.run(
+                    cmd, cwd=cwd, check=check, env=env,
+                    stdout=subprocess.PIPE, stderr=subprocess.STDOUT, text=True,
+                )
+                return result.stdout
+            if log_path is not None:
+                log_path.parent.mkdir(parents=True, exist_ok=True)
+                with open(log_path, "wb") as log_file:
+                    result = subprocess.run(
+                        cmd, cwd=cwd, check=check, env=env,
+                        stdout=log_file, stderr=subprocess.STDOUT,
+                    )
+            elif quiet:
+                result = subprocess.run(
+                    cmd, cwd=cwd, check=check, env=env,
+                    stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL,
+                )
+            else:
+                result = subprocess.run(cmd, cwd=cwd, check=check, env=env)
+            return result.returncode == 0
+        except subprocess.CalledProcessError as e:
+            if check:
+                print(f"[ERROR] Command failed: {' '.join(str(c) for c in cmd)}")
+                raise
+            return e.output if capture else False
+        except FileNotFoundError:
+            if check:
+                raise
+            return None if capture else False
+
+    def _dump_log_tail(self, log_path, lines=20):
+        """Print the last lines of a per-package log after a failure."""
+        try:
+            tail = log_path.read_text(errors="replace").splitlines()[-lines:]
+        except OSError:
+            return
+        for line in tail:
+            print(f"    {line}")
+
+    def _check_command_exists(self, command):
+        """Return True if the command is available on PATH (memoized)."""
+        return _which(command) is not None
+
+    def _check_visual_studio_compiler(self):
+        """Locate cl.exe, probing the filesystem at most once per run."""
+        if not hasattr(self, "_vs_compiler_path"):
+            self._vs_compiler_path = self._probe_visual_studio_compiler()
+        return self._vs_compiler_path
+
+    def _probe_visual_studio_compiler(self):
+        """Probe for cl.exe, cheapest authority first.
+
+        A developer-prompt PATH hit costs nothing, vswhere is the
+        installer's own authoritative index (one subprocess), and only
+        when both come up empty does the conventional-location glob walk
+        the filesystem - a single pattern instead of the old nested
+        iterdir/exists chains over six roots.
+        """
+        import glob
+
+        cl = _which("cl")
+        if cl:
+            return Path(cl)
+
+        vswhere = (Path(os.environ.get("ProgramFiles(x86)",
+                                       "C:/Program Files (x86)"))
+                   / "Microsoft Visual Studio" / "Installer" / "vswhere.exe")
+        if vswhere.exists():
+            out = self._run_command(
+                [str(vswhere), "-latest", "-products", "*",
+                 "-requires",
+                 "Microsoft.VisualStudio.Component.VC.Tools.x86.x64",
+                 "-property", "installationPath"],
+                capture=True, check=False)
+            if out and out.strip():
+                msvc_dir = Path(out.strip().splitlines()[0]) / "VC" / "Tools" / "MSVC"
+                versions = sorted(
+                    msvc_dir.glob("*/bin/Hostx64/x64/cl.exe"), reverse=True)
+                if versions:
+                    return versions[0]
+
+        for match in glob.iglob("C:/Program Files*/Microsoft Visual Studio/"
+                                "20*/*/VC/Tools/MSVC/*/bin/Hostx64/x64/cl.exe"):
+            return Path(match)
+        return None
+
+    # ------------------------------------------------------------------
+    # System dependencies
+    # ------------------------------------------------------------------
+
+    def _environment_fingerprint(self):
+        """Fingerprint the system + installed package set for the no-op check.
+
+        The behavior flags are part of the payload: a run completed with
+        --no-qt or --skip-build did less work than a plain run, and its
+        cache must not satisfy one (aqt-installed Qt never shows up in
+        the package listings hashed below).
+        """
+        system = self.system_info["system"]
+        if system == "linux":
+            listing = self._run_command(
+                ["dpkg-query", "-W", "-f=${Package}\\n"],
+                capture=True, check=False) or ""
+        elif system == "macos":
+            listing = " ".join(self._brew_installed_formulae())
+        else:
+            vcpkg_exe = self.thirdparty_dir / "vcpkg" / "vcpkg.exe"
+            listing = ""
+            if vcpkg_exe.exists():
+                listing = self._run_command([str(vcpkg_exe), "list"],
+                                            capture=True, check=False) or ""
+        payload = "|".join([system, self.system_info["arch"],
+                            f"no_qt={self.no_qt}",
+                            f"skip_build={self.skip_build}",
+                            f"cross_libs={self.cross_libs}",
+                            *sorted(listing.split())])
+        return hashlib.sha256(payload.encode()).hexdigest()
+
+    def setup_cache_is_current(self):
+        """True if a previous run completed against an identical environment."""
+        cache_file = self.thirdparty_dir / ".setup_cache.json"
+        if self.force or not cache_file.exists():
+            return False
+        try:
+            cached = json.loads(cache_file.read_text())
+        except (OSError, ValueError):
+            return False
+        return cached.get("fingerprint") == self._environment_fingerprint()
+
+    def write_setup_cache(self):
+        """Record the environment fingerprint after a successful setup."""
+        cache_file = self.thirdparty_dir / ".setup_cache.json"
+        self.thirdparty_dir.mkdir(parents=True, exist_ok=True)
+        cache_file.write_text(json.dumps({
+            "fingerprint": self._environment_fingerprint(),
+            "timestamp": time.time(),
+        }, indent=2))
+
+    def prefetch_repositories(self):
+        """Shallow-clone vcpkg and emsdk in parallel before installs begin.
+
+        The two clones are independent network fetches; overlapping them
+        hides one behind the other, and the shallow blobless clones only
+        transfer the tip tree instead of the full history.
+        """
+        repos = []
+        vcpkg_dir = self.thirdparty_dir / "vcpkg"
+        if self.system_info["system"] == "windows" and not vcpkg_dir.exists():
+            repos.append(("https://github.com/Microsoft/vcpkg.git", vcpkg_dir))
+        emsdk_dir = self.thirdparty_dir / "emsdk"
+        if not emsdk_dir.exists():
+            repos.append(("https://github.com/emscripten-core/emsdk.git",
+                          emsdk_dir))
+        if not repos:
+            return
+        self.thirdparty_dir.mkdir(parents=True, exist_ok=True)
+        with ThreadPoolExecutor(max_workers=2) as executor:
+            futures = {
+                executor.submit(
+                    self._run_command,
+                    ["git", "clone", "--depth", "1", "--filter=blob:none",
+                     "--single-branch", url, str(dest)],
+                    check=False,
+                ): url
+                for url, dest in repos
+            }
+            for future in as_completed(futures):
+                if not future.result():
+                    print(f"[WARN] Prefetch failed for {futures[future]}")
+
+    def install_system_dependencies(self):
+        """Install the system-level build dependencies for this platform."""
+        system = self.system_info["system"]
+        print(f"[INFO] Installing system dependencies for {system}...")
+        if system == "windows":
+            return self._install_windows_dependencies()
+        elif system == "macos":
+            return self._install_macos_dependencies()
+        elif system == "linux":
+            return self._install_linux_dependencies()
+        return False
+
+    @staticmethod
+    def _deps_hash(deps):
+        return hashlib.sha256("\n".join(sorted(deps)).encode()).hexdigest()
+
+    def _deps_marker_current(self, deps):
+        """True if a prior run installed exactly this dependency set.
+
+        The marker saves the warm path from querying the package manager
+        at all; any change to the dependency list changes the hash and
+        re-arms the full install flow.
+        """
+        if self.force:
+            return False
+        marker = self.thirdparty_dir / ".deps-installed"
+        try:
+            data = json.loads(marker.read_text())
+        except (OSError, ValueError):
+            return False
+        return (data.get("platform") == self.system_info["system"]
+                and data.get("hash") == self._deps_hash(deps))
+
+    def _write_deps_marker(self, deps):
+        """Record a fully successful dependency install for the next run."""
+        marker = self.thirdparty_dir / ".deps-installed"
+        marker.write_text(json.dumps({
+            "platform": self.system_info["system"],
+            "hash": self._deps_hash(deps),
+        }))
+
+    def _choco_install_missing_tools(self):
+        """Install cmake/git via chocolatey where absent.
+
+        The two installs stay serial within this one task: chocolatey
+        holds a global lock and rejects concurrent invocations.
+        """
+        if not self._check_command_exists("cmake"):
+            self._run_command(["choco", "install", "cmake", "-y"], check=False)
+        if not self._check_command_exists("git"):
+            self._run_command(["choco", "install", "git", "-y"], check=False)
+
+    def _install_windows_dependencies(self):
+        """Install Windows build dependencies via chocolatey + vcpkg."""
+        # The chocolatey installs, the precompiled-library download and the
+        # Visual Studio probe are independent; overlap the network-bound
+        # tasks so the precompiled fetch is not queued behind choco.
+        with ThreadPoolExecutor(max_workers=2) as executor:
+            choco_future = None
+            if not self._check_command_exists("choco"):
+                print("[WARN] Chocolatey not found - install it from https://chocolatey.org")
+            else:
+                choco_future = executor.submit(self._choco_install_missing_tools)
+            precompiled_future = executor.submit(
+                self._download_precompiled_libraries)
+
+            if not self._check_visual_studio_compiler():
+                print("[WARN] Visual Studio C++ compiler not found - install the "
+                      "'Desktop development with C++' workload")
+
+            if choco_future is not None:
+                choco_future.result()
+            precompiled = precompiled_future.result()
+
+        # Prefer precompiled libraries when they are available for this triplet
+        if precompiled:
+            print("[OK] Using precompiled libraries, skipping vcpkg build")
+            return True
+
+        vcpkg_dir = self.thirdparty_dir / "vcpkg"
+        vcpkg_exe = vcpkg_dir / "vcpkg.exe"
+        if not vcpkg_dir.exists():
+            print("[INFO] Cloning vcpkg...")
+            self._run_command([
+                "git", "clone", "--depth", "1", "--filter=blob:none",
+                "--single-branch", "https://github.com/Microsoft/vcpkg.git",
+                str(vcpkg_dir),
+            ])
+        if not vcpkg_exe.exists():
+            self._run_command([str(vcpkg_dir / "bootstrap-vcpkg.bat")], cwd=vcpkg_dir)
+        self._run_command([str(vcpkg_exe), "integrate", "install"], check=False)
+
+        core_dependencies = [
+            "sdl2", "sdl2-image", "sdl2-ttf", "sdl2-mixer",
+            "glad", "glm", "box2d", "bullet3", "assimp", "lua",
+            "yaml-cpp", "pugixml", "nlohmann-json", "spdlog", "fmt",
+            "freetype",
+        ]
+        audio_dependencies = [
+            "libogg", "libvorbis", "libflac", "opus", "libsndfile",
+        ]
+        compression_dependencies = [
+            "zlib", "bzip2", "lz4", "zstd", "libpng", "libjpeg-turbo",
+        ]
+        python_dependencies = [
+            "python3", "pybind11",
+        ]
+        # Order-preserving dedupe across the categories, then schedule the
+        # most expensive builds first to shrink the pool's tail latency.
+        all_dependencies = list(dict.fromkeys(
+            core_dependencies + audio_dependencies +
+            compression_dependencies + python_dependencies))
+        all_dependencies.sort(key=lambda d: -_INSTALL_COST.get(d, 10))
+
+        triplet = self.system_info["triplet"]
+
+        # Query installed state once and skip the whole install when
+        # nothing is missing - each vcpkg invocation costs seconds even
+        # for no-ops.
+        missing = all_dependencies
+        if not self.force:
+            listing = self._run_command([str(vcpkg_exe), "list"],
+                                        capture=True, check=False) or ""
+            installed = {line.split(":")[0].strip()
+                         for line in listing.splitlines() if ":" in line}
+            missing = [d for d in all_dependencies if d not in installed]
+        if not missing:
+            print("[OK] All vcpkg packages already installed")
+            return True
+
+        print(f"[INFO] Installing {len(missing)} vcpkg packages "
+              f"({triplet})...")
+        # One manifest-mode invocation resolves the dependency graph once
+        # and lets vcpkg schedule the builds itself. The manifest must
+        # carry the FULL dependency list: manifest mode makes the install
+        # root match the manifest exactly, so a missing-only subset would
+        # prune the ports installed on earlier runs. Already-installed
+        # ports cost the run nothing. The per-package pool remains as the
+        # fallback because it pinpoints which port failed, and there the
+        # missing subset is the right scope.
+        if self._install_vcpkg_packages_manifest(
+                vcpkg_exe, all_dependencies, triplet):
+            print(f"[OK] Installed {len(missing)} vcpkg packages")
+            return True
+        print("[WARN] Manifest install failed - retrying per package")
+        failed_deps = self._install_vcpkg_packages_parallel(
+            vcpkg_exe, missing, triplet)
+        if failed_deps:
+            print(f"[WARN] {len(failed_deps)} packages failed: "
+                  f"{', '.join(failed_deps)}")
+        return not failed_deps
+
+    def _vcpkg_child_env(self):
+        """Environment for vcpkg children wired to the binary cache."""
+        return dict(
+            self._build_env,
+            VCPKG_MAX_CONCURRENCY="1",
+            VCPKG_DEFAULT_BINARY_CACHE=str(self.cache_dir),
+            VCPKG_BINARY_SOURCES=self._setup_vcpkg_binary_caching(),
+        )
+
+    def _install_vcpkg_packages_manifest(self, vcpkg_exe, packages, triplet):
+        """Install all packages with a single manifest-mode vcpkg run.
+
+        Per-package invocations each re-parse the port tree and re-resolve
+        the dependency graph - fixed overhead multiplied by the package
+        count. A generated manifest in its own root (the repo's committed
+        vcpkg.json stays untouched) pays that cost once.
+        """
+        manifest_root = self.thirdparty_dir / "vcpkg-manifest"
+        manifest_root.mkdir(parents=True, exist_ok=True)
+        (manifest_root / "vcpkg.json").write_text(json.dumps({
+            "name": "lupine-setup-deps",
+            "version-string": "0.0.0",
+            "dependencies": sorted(packages),
+        }, indent=2))
+        env = self._vcpkg_child_env()
+        # The manifest run owns the whole machine, so let vcpkg
+        # parallelize internally instead of pinning it to one job.
+        env["VCPKG_MAX_CONCURRENCY"] = str(os.cpu_count() or 4)
+        log_dir = self.thirdparty_dir / "logs"
+        return self._run_command(
+            [str(vcpkg_exe), "install", f"--triplet={triplet}",
+             "--clean-after-build",
+             f"--x-manifest-root={manifest_root}",
+             f"--x-install-root={vcpkg_exe.parent / 'installed'}"],
+            check=False, env=env, log_path=log_dir / "vcpkg-manifest.log",
+        )
+
+    def _install_vcpkg_packages_parallel(self, vcpkg_exe, packages, triplet):
+        """Install vcpkg packages concurrently; return the failed subset.
+
+        vcpkg serializes one port per process but tolerates concurrent
+        invocations for independent ports, so fan the installs out and keep
+        each child from oversubscribing the machine on its own. Every child
+        points at the persistent binary cache so ports built on a previous
+        run are restored instead of recompiled. ``packages`` should arrive
+        pre-sorted most-expensive-first to shrink the pool's tail latency.
+        """
+        child_env = self._vcpkg_child_env()
+        failed = []
+        log_dir = self.thirdparty_dir / "logs"
+        # Each worker is a compiler subprocess that releases the GIL, so
+        # the pool can scale with the core count; VCPKG_MAX_CONCURRENCY=1
+        # above keeps each child single-threaded so the fan-out itself is
+        # the only source of parallelism. LUPINE_VCPKG_JOBS overrides the
+        # default for constrained or very large machines.
+        try:
+            jobs = int(os.environ.get("LUPINE_VCPKG_JOBS", ""))
+        except ValueError:
+            jobs = 0
+        if jobs < 1:
+            jobs = os.cpu_count() or 4
+        max_workers = max(1, min(jobs, len(packages)))
+        with ThreadPoolExecutor(max_workers=max_workers) as executor:
+            futures = {
+                executor.submit(
+                    self._run_command,
+                    [str(vcpkg_exe), "install", f"{dep}:{triplet}",
+                     "--clean-after-build"],
+                    check=False, env=child_env,
+                    log_path=log_dir / f"{dep}.log",
+                ): dep
+                for dep in packages
+            }
+            for future in as_completed(futures):
+                dep = futures[future]
+                if future.result():
+                    with self._print_lock:
+                        print(f"[OK] Installed {dep}")
+                else:
+                    failed.append(dep)
+                    with self._print_lock:
+                        print(f"[ERROR] Failed to install {dep}")
+                        self._dump_log_tail(log_dir / f"{dep}.log")
+        return failed
+
+    def _brew_installed_formulae(self):
+        """Installed Homebrew formula names, read straight from the Cellar.
+
+        ``brew list --formula`` boots a full Ruby interpreter just to print
+        the Cellar directory listing; reading the directory ourselves gives
+        the same set in microseconds.  Falls back to the subprocess if
+        neither standard prefix exists.
+        """
+        for prefix in ("/opt/homebrew", "/usr/local"):
+            try:
+                with os.scandir(os.path.join(prefix, "Cellar")) as entries:
+                    return {e.name for e in entries
+                            if e.is_dir(follow_symlinks=False)}
+            except OSError:
+                continue
+        listing = self._run_command(["brew", "list", "--formula"],
+                                    capture=True, check=False) or ""
+        return set(listing.split())
+
+    def _install_macos_dependencies(self):
+        """Install macOS build dependencies via Homebrew."""
+        if not self._check_command_exists("brew"):
+            print("[INFO] Installing Homebrew...")
+            import urllib.request
+
+            # Pipe the installer straight into bash instead of buffering the
+            # whole script in memory first.
+            with urllib.request.urlopen(
+                "https://raw.githubusercontent.com/Homebrew/install/HEAD/install.sh"
+            ) as response:
+                proc = subprocess.Popen(["bash"], stdin=subprocess.PIPE)
+                shutil.copyfileobj(response, proc.stdin)
+                proc.stdin.close()
+                if proc.wait() != 0:
+                    print("[ERROR] Homebrew install failed")
+                    return False
+
+        self._run_command(["brew", "update"], check=False)
+
+        all_dependencies = [
+            "cmake", "ninja", "pkg-config",
+            "sdl2", "sdl2_image", "sdl2_ttf", "sdl2_mixer",
+            "glm", "box2d", "bullet", "assimp", "lua",
+            "yaml-cpp", "pugixml", "nlohmann-json", "spdlog", "fmt",
+            "freetype", "libogg", "libvorbis", "flac", "opus", "libsndfile",
+            "lz4", "zstd", "libpng", "jpeg-turbo", "pybind11",
+        ]
+        all_dependencies = list(dict.fromkeys(all_dependencies))
+        requested = list(all_dependencies)
+        if self._deps_marker_current(requested):
+            print("[OK] System dependencies already installed")
+            return True
+
+        if not self.force:
+            installed = self._brew_installed_formulae()
+            all_dependencies = [d for d in all_dependencies
+                                if d not in installed]
+        if not all_dependencies:
+            print("[OK] All brew packages already installed")
+            ok = self._install_python_dependencies()
+            if ok:
+                self._write_deps_marker(requested)
+            return ok
+
+        print(f"[INFO] Installing {len(all_dependencies)} brew packages...")
+        # One batched invocation lets brew resolve and download the whole
+        # formula set concurrently instead of paying ~25 subprocess
+        # startups and per-formula dependency resolutions.
+        failed_deps = []
+        if not self._run_command(["brew", "install"] + all_dependencies,
+                                 check=False):
+            # Determine what actually failed from the installed set rather
+            # than the batch exit code, then retry just those individually.
+            installed = self._brew_installed_formulae()
+            missing = [d for d in all_dependencies if d not in installed]
+            log_dir = self.thirdparty_dir / "logs"
+            with ThreadPoolExecutor(max_workers=4) as executor:
+                futures = {
+                    executor.submit(
+                        self._run_command, ["brew", "install", dep],
+                        check=False, log_path=log_dir / f"{dep}.log",
+                    ): dep
+                    for dep in missing
+                }
+                for future in as_completed(futures):
+                    dep = futures[future]
+                    if not future.result():
+                        failed_deps.append(dep)
+                        with self._print_lock:
+                            print(f"[ERROR] Failed to install {dep}")
+                            self._dump_log_tail(log_dir / f"{dep}.log")
+
+        if failed_deps:
+            print(f"[WARN] {len(failed_deps)} packages failed: "
+                  f"{', '.join(failed_deps)}")
+
+        ok = self._install_python_dependencies()
+        if ok and not failed_deps:
+            self._write_deps_marker(requested)
+        return ok
+
+    def _install_linux_dependencies(self):
+        """Install Linux build dependencies via apt."""
+        all_deps = [
+            "build-essential", "cmake", "ninja-build", "pkg-config", "git",
+            "libsdl2-dev", "libsdl2-image-dev", "libsdl2-ttf-dev",
+            "libsdl2-mixer-dev", "libglm-dev", "libbox2d-dev",
+            "libbullet-dev", "libassimp-dev", "liblua5.4-dev",
+            "libyaml-cpp-dev", "libpugixml-dev", "nlohmann-json3-dev",
+            "libspdlog-dev", "libfmt-dev", "libfreetype-dev",
+            "libogg-dev", "libvorbis-dev", "libflac-dev", "libopus-dev",
+            "libsndfile1-dev", "zlib1g-dev", "libbz2-dev", "liblz4-dev",
+            "libzstd-dev", "libpng-dev", "libjpeg-turbo8-dev",
+            "python3-dev", "pybind11-dev",
+            "libx11-dev", "libxrandr-dev", "libgl1-mesa-dev",
+        ]
+        all_deps = list(dict.fromkeys(all_deps))
+        requested = list(all_deps)
+        if self._deps_marker_current(requested):
+            print("[OK] System dependencies already installed")
+            return True
+
+        # Refreshing the package lists costs ~10s; skip it when they are
+        # less than an hour old.
+        try:
+            lists_fresh = (os.path.getmtime("/var/lib/apt/lists")
+                           > time.time() - 3600)
+        except OSError:
+            lists_fresh = False
+        if not lists_fresh:
+            self._run_command(["sudo", "apt-get", "-qq", "update"], check=False)
+
+        if not self.force:
+            listing = self._run_command(
+                ["dpkg-query", "-W", "-f=${Package}\\n"],
+                capture=True, check=False) or ""
+            installed = set(listing.split())
+            all_deps = [d for d in all_deps if d not in installed]
+        if not all_deps:
+            print("[OK] All apt packages already installed")
+            ok = self._install_python_dependencies()
+            if ok:
+                self._write_deps_marker(requested)
+            return ok
+
+        print(f"[INFO] Installing {len(all_deps)} apt packages...")
+        failed_deps = []
+        # One transaction lets apt solve dependencies once and download in
+        # parallel instead of re-locking dpkg per chunk.
+        if not self._run_command(
+            ["sudo", "apt-get", "-qq", "install", "-y", "--no-install-recommends",
+             "-o", "Dpkg::Use-Pty=0"]
+            + all_deps,
+            check=False,
+        ):
+            # The batch failed as a whole; retry packages individually to
+            # identify the actual offenders. apt-get fails immediately
+            # when another invocation holds the dpkg lock (the lock
+            # timeout defaults to 0), so give each retry a generous lock
+            # timeout - the loser of the race then waits its turn instead
+            # of being reported as a failed package.
+            log_dir = self.thirdparty_dir / "logs"
+            with ThreadPoolExecutor(max_workers=2) as executor:
+                futures = {
+                    executor.submit(
+                        self._run_command,
+                        ["sudo", "apt-get", "-qq", "install", "-y",
+                         "-o", "Dpkg::Use-Pty=0",
+                         "-o", "DPkg::Lock::Timeout=300", dep], check=False,
+                        log_path=log_dir / f"{dep}.log",
+                    ): dep
+                    for dep in all_deps
+                }
+                for future in as_completed(futures):
+                    dep = futures[future]
+                    if not future.result():
+                        failed_deps.append(dep)
+                        with self._print_lock:
+                            print(f"[ERROR] Failed to install {dep}")
+                            self._dump_log_tail(log_dir / f"{dep}.log")
+
+        if failed_deps:
+            print(f"[WARN] {len(failed_deps)} packages failed: "
+                  f"{', '.join(failed_deps)}")
+
+        ok = self._install_python_dependencies()
+        if ok and not failed_deps:
+            self._write_deps_marker(requested)
+        return ok
+
+    def _install_python_dependencies(self):
+        """Install the Python packages the setup and build tooling need."""
+        # The script is itself running under a Python interpreter, so
+        # sys.executable is the authoritative answer - no PATH probing,
+        # and pip installs into the same interpreter the build will use.
+        python_cmd = sys.executable
+
+        python_packages = ["requests", "aqtinstall", "setuptools", "wheel"]
+        # One pip invocation solves and downloads all packages together
+        # instead of restarting the interpreter and resolver per package.
+        pip_env = dict(os.environ,
+                       PIP_DISABLE_PIP_VERSION_CHECK="1",
+                       PIP_NO_INPUT="1")
+        if self._run_command(
+            [python_cmd, "-m", "pip", "install", "--user",
+             "--upgrade-strategy", "only-if-needed"] + python_packages,
+            check=False, env=pip_env,
+        ):
+            return True
+
+        # The batch failed; retry per package concurrently (pip spends its
+        # time in network and subprocess I/O) to pin down the offenders.
+        failed = []
+        with ThreadPoolExecutor(max_workers=4) as executor:
+            futures = {
+                executor.submit(
+                    self._run_command,
+                    [python_cmd, "-m", "pip", "install", "--user", pkg],
+                    check=False, env=pip_env,
+                ): pkg
+                for pkg in python_packages
+            }
+            for future in as_completed(futures):
+                if not future.result():
+                    failed.append(futures[future])
+        if failed:
+            print(f"[WARN] Failed to install Python packages: "
+                  f"{', '.join(sorted(failed))}")
+            return False
+        return True
+
+    # ------------------------------------------------------------------
+    # Precompiled libraries
+    # ------------------------------------------------------------------
+
+    def _fetch_url(self, url, dest, timeout=30):
+        """Download url to dest, with parallel ranged requests when possible.
+
+        A single HTTPS stream caps the transfer at one TCP connection's
+        throughput. When the server advertises byte ranges (GitHub's
+        release CDN does), the file is split into eight ranges fetched
+        concurrently, each written into a preallocated file at its own
+        offset via pwrite. Small files and range-less servers fall back to
+        a plain streamed copy.
+        """
+        import urllib.request
+
+        size = 0
+        ranges_ok = False
+        try:
+            head = urllib.request.Request(url, method="HEAD")
+            with urllib.request.urlopen(head, timeout=timeout) as resp:
+                size = int(resp.headers.get("Content-Length") or 0)
+                ranges_ok = resp.headers.get("Accept-Ranges") == "bytes"
+        except Exception:
+            pass
+
+        # pwrite is POSIX-only; Windows falls back to the streamed copy.
+        if not ranges_ok or size < (8 << 20) or not hasattr(os, "pwrite"):
+            with urllib.request.urlopen(url, timeout=timeout) as response, \
+                    open(dest, "wb") as f:
+                # Preallocating when the size is known lets the filesystem
+                # lay the file out contiguously instead of growing it one
+                # buffer at a time.
+                length = int(response.headers.get("Content-Length") or size)
+                if length:
+                    try:
+                        if hasattr(os, "posix_fallocate"):
+                            os.posix_fallocate(f.fileno(), 0, length)
+                        else:
+                            os.ftruncate(f.fileno(), length)
+                    except OSError:
+                        pass
+                shutil.copyfileobj(response, f, 1 << 20)
+            return
+
+        workers = 8
+        chunk = -(-size // workers)
+        fd = os.open(dest, os.O_CREAT | os.O_WRONLY | os.O_TRUNC, 0o644)
+        try:
+            os.ftruncate(fd, size)
+
+            def fetch_range(start):
+                end = min(start + chunk, size) - 1
+                req = urllib.request.Request(
+                    url, headers={"Range": f"bytes={start}-{end}"})
+                offset = start
+                with urllib.request.urlopen(req, timeout=timeout) as resp:
+                    while True:
+                        data = resp.read(1 << 20)
+                        if not data:
+                            break
+                        os.pwrite(fd, data, offset)
+                        offset += len(data)
+
+            with ThreadPoolExecutor(max_workers=workers) as executor:
+                for future in [executor.submit(fetch_range, start)
+                               for start in range(0, size, chunk)]:
+                    future.result()
+        finally:
+            os.close(fd)
+
+    def _extract_zip_parallel(self, archive, dest):
+        """Extract a zip with one worker (and zip handle) per name slice.
+
+        ZipFile serializes reads on a shared file handle, so a single
+        extractall cannot overlap decompression across cores; each worker
+        opening the archive independently removes that lock.
+        """
+        import zipfile
+
+        with zipfile.ZipFile(archive) as zf:
+            names = zf.namelist()
+        workers = min(8, os.cpu_count() or 4)
+        if len(names) < workers * 4:
+            with zipfile.ZipFile(archive) as zf:
+                zf.extractall(dest)
+            return
+
+        # Pre-create every directory up front: ZipFile.extract's own
+        # makedirs has no exist_ok, so two workers materializing entries
+        # from the same new directory would race to FileExistsError.
+        for d in {os.path.dirname(name) for name in names}:
+            if d:
+                os.makedirs(os.path.join(dest, d), exist_ok=True)
+
+        def extract_slice(slice_names):
+            with zipfile.ZipFile(archive) as zf:
+                for name in slice_names:
+                    zf.extract(name, dest)
+
+        with ThreadPoolExecutor(max_workers=workers) as executor:
+            for future in [executor.submit(extract_slice, names[i::workers])
+                           for i in range(workers)]:
+                future.result()
+
+    def _download_precompiled_libraries(self, triplet=None):
+        """Download and extract the precompiled library archive if published."""
+        triplet = triplet or self.system_info["triplet"]
+        archive_name = f"lupine-libs-{triplet}.zip"
+        download_url = (
+            "https://github.com/abagaild/Lupine-Game-Engine/releases/download/"
+            f"precompiled-libs/{archive_name}"
+        )
+        local_path = self.thirdparty_dir / archive_name
+        self.thirdparty_dir.mkdir(parents=True, exist_ok=True)
+
+        import urllib.error
+        import urllib.request
+
+        # The marker is only written after a successful extraction, so a
+        # 304 answer means the libraries on disk are already current and
+        # the multi-hundred-MB fetch collapses to one round trip. One
+        # marker per triplet - the cross-compilation path downloads
+        # several archives and their ETags must not cross-wire. A 304 is
+        # only trusted while the extracted tree still passes the on-disk
+        # check: the archive is deleted after extraction, so a damaged
+        # tree has nothing local to recover from and must re-download.
+        etag_marker = self.thirdparty_dir / f".libs-etag-{triplet}"
+        target = next((p for p, t in self._EXPORT_TARGETS.items()
+                       if t == triplet), None)
+        tree_ok = (target is not None
+                   and self._platform_libraries_exist(target))
+        if not tree_ok:
+            etag_marker.unlink(missing_ok=True)
+        new_etag = ""
+        try:
+            head = urllib.request.Request(download_url, method="HEAD")
+            if not self.force and tree_ok and etag_marker.exists():
+                prior = etag_marker.read_text().strip()
+                if prior:
+                    head.add_header("If-None-Match", prior)
+            with urllib.request.urlopen(head, timeout=30) as resp:
+                new_etag = resp.headers.get("ETag", "")
+        except urllib.error.HTTPError as e:
+            if e.code == 304:
+                print("[OK] Precompiled libraries are up to date (ETag match)")
+                return True
+        except Exception:
+            pass
+
+        print(f"[INFO] Downloading precompiled libraries: {archive_name}")
+        try:
+            self._fetch_url(download_url, local_path)
+        except Exception as e:
+            print(f"[WARN] Precompiled libraries not available: {e}")
+            local_path.unlink(missing_ok=True)
+            return False
+
+        print("[INFO] Extracting precompiled libraries...")
+        self._extract_zip_parallel(local_path, self.thirdparty_dir)
+        local_path.unlink()
+        if new_etag:
+            etag_marker.write_text(new_etag)
+        print("[OK] Precompiled libraries installed")
+        return True
+
+    def _setup_vcpkg_binary_caching(self):
+        """Compose the VCPKG_BINARY_SOURCES value for vcpkg children.
+
+        The persistent local cache makes the second setup run restore
+        previously compiled ports instead of rebuilding them; under GitHub
+        Actions the x-gha backend is added so CI runs share artifacts
+        through the Actions cache (the workflow must export
+        ACTIONS_CACHE_URL and ACTIONS_RUNTIME_TOKEN for it to engage).
+        """
+        sources = f"clear;files,{self.cache_dir},readwrite"
+        if os.environ.get("GITHUB_ACTIONS") == "true":
+            sources += ";x-gha,readwrite"
+        nuget_source = os.environ.get("VCPKG_NUGET_SOURCE")
+        if nuget_source:
+            sources += f";nuget,{nuget_source},readwrite"
+        return sources
+
+    # ------------------------------------------------------------------
+    # Qt
+    # ------------------------------------------------------------------
+
+    def setup_qt(self):
+        """Make a Qt 6 installation available for the editor build."""
+        if self.no_qt:
+            print("[INFO] Skipping Qt setup (--no-qt)")
+            return True
+
+        if self.existing_qt is not None:
+            print(f"[OK] Using existing Qt installation: {self.existing_qt}")
+            return True
+
+        system = self.system_info["system"]
+        if system == "windows":
+            return self._install_static_qt_windows()
+        elif system == "macos":
+            return self._install_static_qt_macos()
+        elif system == "linux":
+            return self._install_static_qt_linux()
+        return False
+
+    @functools.cached_property
+    def existing_qt(self):
+        """The detected Qt installation, probed at most once per run.
+
+        The candidate walk stats dozens of paths and its answer cannot
+        change while the process lives, so later callers (verification,
+        the per-platform installers) read the cached result.
+        """
+        return self._detect_existing_qt()
+
+    def _detect_existing_qt(self):
+        """Look for an existing Qt 6 installation in the usual locations."""
+        # Only probe paths that can exist on this OS; the Windows and
+        # Homebrew roots are never valid elsewhere and each one costs a
+        # stat() to rule out.
+        system = self.system_info["system"]
+        if system == "windows":
+            qt_paths = (
+                Path("C:/Qt"),
+                Path(os.environ.get("LOCALAPPDATA", "C:/")) / "Qt",
+                self.thirdparty_dir / "qt",
+            )
+        elif system == "macos":
+            qt_paths = (
+                Path("/opt/homebrew/opt/qt"),
+                Path("/usr/local/opt/qt"),
+                Path.home() / "Qt",
+                self.thirdparty_dir / "qt",
+            )
+        else:
+            qt_paths = (
+                Path.home() / "Qt",
+                Path("/opt/Qt"),
+                Path("/usr/lib/qt6"),
+                self.thirdparty_dir / "qt",
+            )
+        for qt_path in qt_paths:
+            if not qt_path.exists():
+                continue
+            if self._is_valid_qt_installation(qt_path):
+                return qt_path
+            # Version subdirectories (6.5.3/gcc_64 and friends); scandir
+            # gives the is_dir answer from the directory listing itself.
+            try:
+                with os.scandir(qt_path) as entries:
+                    versions = [e.path for e in entries
+                                if e.name[:2] in ("6.", "5.")
+                                and e.is_dir(follow_symlinks=False)]
+            except OSError:
+                continue
+            for version_dir in versions:
+                try:
+                    with os.scandir(version_dir) as entries:
+                        for sub in entries:
+                            if sub.is_dir() and self._is_valid_qt_installation(Path(sub.path)):
+                                return Path(sub.path)
+                except OSError:
+                    continue
+        return None
+
+    def _is_valid_qt_installation(self, qt_path):
+        """Check a candidate directory for the markers of a usable Qt install.
+
+        One scandir per marker directory replaces a stat per marker, and
+        a missing directory rules out all of its markers at once.
+        """
+        for rel_dir, names in self._qt_indicators.items():
+            try:
+                with os.scandir(os.path.join(qt_path, rel_dir)) as entries:
+                    present = {e.name for e in entries}
+            except OSError:
+                continue
+            if names & present:
+                return True
+        return False
+
+    def _install_static_qt_windows(self):
+        """Install Qt on Windows via aqtinstall."""
+        qt_dir = self.thirdparty_dir / "qt"
+        if self._run_command(
+            [sys.executable, "-m", "aqt", "install-qt", "windows", "desktop",
+             "6.5.3", "win64_msvc2019_64", "-O", str(qt_dir),
+             "--archives", "qtbase", "qttools", "qtdeclarative"],
+            check=False, env=self._build_env,
+        ):
+            return self._setup_qt_windows(qt_dir)
+        print("[ERROR] aqt install-qt failed")
+        return False
+
+    def _install_static_qt_macos(self):
+        """Install Qt on macOS via aqtinstall (Homebrew qt as fallback)."""
+        qt_dir = self.thirdparty_dir / "qt"
+        if self._run_command(
+            [sys.executable, "-m", "aqt", "install-qt", "mac", "desktop",
+             "6.5.3", "clang_64", "-O", str(qt_dir),
+             "--archives", "qtbase", "qttools", "qtdeclarative"],
+            check=False, env=self._build_env,
+        ):
+            return self._setup_qt_macos(qt_dir)
+        if self._run_command(["brew", "install", "qt"], check=False):
+            return self._setup_qt_macos(Path("/opt/homebrew/opt/qt"))
+        return False
+
+    def _install_static_qt_linux(self):
+        """Install Qt on Linux via aqtinstall (distro packages as fallback)."""
+        qt_dir = self.thirdparty_dir / "qt"
+        if self._run_command(
+            [sys.executable, "-m", "aqt", "install-qt", "linux", "desktop",
+             "6.5.3", "gcc_64", "-O", str(qt_dir),
+             "--archives", "qtbase", "qttools", "qtdeclarative"],
+            check=False, env=self._build_env,
+        ):
+            return self._setup_qt_linux(qt_dir)
+        return self._run_command(
+            ["sudo", "apt-get", "-qq", "install", "-y", "qt6-base-dev", "qt6-tools-dev"],
+            check=False,
+        )
+
+    def _setup_qt_windows(self, qt_dir):
+        """Lay out the Qt directory structure expected by the CMake config."""
+        sentinel = qt_dir / ".setup_done"
+        if sentinel.exists():
+            return True
+        for name in ("bin", "lib", "include", "share"):
+            leaf = os.path.join(qt_dir, name)
+            if not os.path.isdir(leaf):
+                os.makedirs(leaf, exist_ok=True)
+        sentinel.touch()
+        print(f"[OK] Qt directory prepared at {qt_dir}")
+        return True
+
+    def _setup_qt_macos(self, qt_src):
+        """Symlink the installed Qt into thirdparty/qt."""
+        qt_dir = self.thirdparty_dir / "qt"
+        # EAFP instead of an exists() pre-check avoids the TOCTOU stat.
+        try:
+            qt_dir.symlink_to(qt_src)
+        except FileExistsError:
+            pass
+        print(f"[OK] Qt available at {qt_dir}")
+        return True
+
+    def _setup_qt_linux(self, qt_dir):
+        """Verify the system Qt libraries the build will link against."""
+        qt_paths = [
+            "/usr/lib/x86_64-linux-gnu/qt6",
+            "/usr/lib/qt6",
+            "/usr/share/qt6",
+            str(qt_dir),
+        ]
+        # Group candidates by parent and list each parent once rather than
+        # stat()ing every candidate individually.
+        by_parent = {}
+        for qt_path in qt_paths:
+            parent, name = os.path.split(qt_path)
+            by_parent.setdefault(parent, []).append(name)
+        for parent, names in by_parent.items():
+            try:
+                entries = {e.name for e in os.scandir(parent)}
+            except OSError:
+                continue
+            for name in names:
+                if name in entries:
+                    print(f"[OK] Qt found at {os.path.join(parent, name)}")
+                    return True
+        print("[WARN] No Qt libraries found on the system")
+        return False
+
+    # ------------------------------------------------------------------
+    # Emscripten
+    # ------------------------------------------------------------------
+
+    def setup_emscripten(self):
+        """Clone and activate the Emscripten SDK for web exports."""
+        emsdk_dir = self.thirdparty_dir / "emsdk"
+        if not emsdk_dir.exists():
+            print("[INFO] Cloning emsdk...")
+            if not self._run_command([
+                "git", "clone", "--depth", "1", "--filter=blob:none",
+                "--single-branch",
+                "https://github.com/emscripten-core/emsdk.git",
+                str(emsdk_dir),
+            ], check=False):
+                print("[ERROR] Failed to clone emsdk")
+                return False
+
+        emsdk = emsdk_dir / ("emsdk.bat" if self.system_info["system"] == "windows"
+                             else "emsdk")
+        # "emsdk install latest" re-downloads the toolchain even when it is
+        # already on disk; skip it when the compiler is present.
+        emcc = emsdk_dir / "upstream" / "emscripten" / "emcc.py"
+        if emcc.exists() and not self.force:
+            print("[OK] Emscripten toolchain already installed")
+        elif not self._run_command([str(emsdk), "install", "latest"],
+                                   cwd=emsdk_dir, check=False):
+            print("[ERROR] emsdk install failed")
+            return False
+        if not self._run_command([str(emsdk), "activate", "latest"],
+                                 cwd=emsdk_dir, check=False):
+            print("[ERROR] emsdk activate failed")
+            return False
+        print("[OK] Emscripten SDK ready")
+        return True
+
+    # ------------------------------------------------------------------
+    # Cross-compilation libraries
+    # ------------------------------------------------------------------
+
+    def setup_cross_compilation_libraries(self):
+        """Fetch precompiled libraries for every export target platform."""
+        pending = {}
+        for target, triplet in self._EXPORT_TARGETS.items():
+            if self._platform_libraries_exist(target) and not self.force:
+                print(f"[OK] Libraries for {target} already present")
+            else:
+                pending[target] = triplet
+        ok = True
+        if pending:
+            # The fetches are independent HTTPS GETs; four concurrent
+            # streams saturate the link instead of serializing round trips.
+            with ThreadPoolExecutor(max_workers=len(pending)) as executor:
+                futures = {
+                    executor.submit(self._download_precompiled_libraries,
+                                    triplet): target
+                    for target, triplet in pending.items()
+                }
+                for future in as_completed(futures):
+                    target = futures[future]
+                    if not future.result():
+                        with self._print_lock:
+                            print(f"[WARN] Could not fetch libraries for {target}")
+                        ok = False
+            # Re-hashing the trees is only owed to fresh downloads; a
+            # run where everything validated must stay a no-op.
+            self._create_cross_compilation_manifest()
+        return ok
+
+    def _platform_libraries_exist(self, target):
+        """Check whether the essential libraries for a platform are on disk.
+
+        When a manifest from a prior run records the expected files, every
+        entry is verified by name and size (one scandir, no hashing on the
+        hot path) so partial or stale downloads re-trigger the fetch. With
+        no manifest yet, fall back to the original substring probe.
+        """
+        lib_dir = self.thirdparty_dir / target / "lib"
+        manifest_file = self.thirdparty_dir / "cross_compilation_manifest.json"
+        try:
+            manifest = _load_manifest(str(manifest_file),
+                                      manifest_file.stat().st_mtime_ns)
+        except OSError:
+            manifest = None
+        expected = ((manifest or {}).get("platforms", {})
+                    .get(target, {}).get("files"))
+        try:
+            with os.scandir(lib_dir) as entries:
+                on_disk = {e.name: e.stat().st_size
+                           for e in entries if e.is_file()}
+        except OSError:
+            return False
+        if expected:
+            return all(f["name"] in on_disk and on_disk[f["name"]] == f["size"]
+                       for f in expected)
+        return all(any(marker in name for name in on_disk)
+                   for marker in ("SDL2", "glad", "lua", "yaml-cpp"))
+
+    @staticmethod
+    def _file_sha256(path):
+        digest = hashlib.sha256()
+        with open(path, "rb") as f:
+            while True:
+                block = f.read(1 << 20)
+                if not block:
+                    break
+                digest.update(block)
+        return digest.hexdigest()
+
+    def _create_cross_compilation_manifest(self):
+        """Write a manifest of the libraries available per platform.
+
+        Each file is recorded with its size and sha256 so later runs can
+        detect partial or corrupted downloads; the hashing happens here,
+        once per (re)download, not on the per-run existence check.
+        """
+        manifest = {"platforms": {}}
+        # Only the four export-target trees belong in the manifest;
+        # scanning all of thirdparty/ would pull multi-GB bystanders
+        # like qt/lib into the hash. scandir's DirEntry carries the type
+        # and stat information from the directory listing itself, where
+        # iterdir + is_file + stat costs two extra syscalls per library
+        # file.
+        for name in self._EXPORT_TARGETS:
+            lib_dir = self.thirdparty_dir / name / "lib"
+            try:
+                with os.scandir(lib_dir) as entries:
+                    files = sorted(
+                        (e for e in entries
+                         if e.is_file(follow_symlinks=False)),
+                        key=lambda e: e.name,
+                    )
+                    manifest["platforms"][name] = {
+                        "files": [{
+                            "name": e.name,
+                            "size": e.stat().st_size,
+                            "sha256": self._file_sha256(e.path),
+                        } for e in files],
+                        "count": len(files),
+                    }
+            except OSError:
+                continue
+        manifest_file = self.thirdparty_dir / "cross_compilation_manifest.json"
+        manifest_file.write_bytes(_json_dump_bytes(manifest))
+        return manifest_file
+
+    def setup_cross_platform_libraries(self):
+        """Create the per-platform thirdparty directory layout."""
+        # One makedirs per leaf creates the platform dir implicitly, and
+        # the isdir pre-check makes the warm run a stat per leaf instead
+        # of an EEXIST-swallowing mkdir attempt - cheap locally, and on
+        # network-mounted thirdparty dirs every syscall counts.
+        for target in ("windows", "linux", "macosx", "macarm64"):
+            for sub in ("lib", "include", "bin", "share"):
+                leaf = os.path.join(self.thirdparty_dir, target, sub)
+                if not os.path.isdir(leaf):
+                    os.makedirs(leaf, exist_ok=True)
+        return True
+
+    def _setup_export_libraries(self):
+        """Write the manifest describing the libraries bundled per export target."""
+        manifest_file = self.thirdparty_dir / "library_manifest.json"
+        if (manifest_file.exists()
+                and manifest_file.read_bytes() == _LIBRARY_MANIFEST_BYTES):
+            return True
+        manifest_file.write_bytes(_LIBRARY_MANIFEST_BYTES)
+        return True
+
+    # ------------------------------------------------------------------
+    # CMake config + build scripts
+    # ------------------------------------------------------------------
+
+    def generate_cmake_config(self):
+        """Generate cmake/PlatformConfig.cmake from the detected system info."""
+        system = self.system_info["system"]
+        platform_dir = self.system_info["platform_dir"]
+        triplet = self.system_info["triplet"]
+
+        # Collect chunks and join once at the end; repeated += on a growing
+        # string is O(N^2).
+        parts = [
+            "# Auto-generated by setup_build_environment.py\n"
+            "# Do not edit - rerun the setup script instead\n\n"
+            f'set(LUPINE_PLATFORM_DIR "{platform_dir}")\n'
+            f'set(LUPINE_VCPKG_TRIPLET "{triplet}")\n'
+            'set(PLATFORM_DIR "${CMAKE_CURRENT_SOURCE_DIR}/thirdparty/${LUPINE_PLATFORM_DIR}")\n\n'
+        ]
+
+        if system == "windows":
+            parts.append(
+                "# Windows: static MSVC runtime, vcpkg static triplet\n"
+                'set(VCPKG_TARGET_TRIPLET "x64-windows-static" CACHE STRING "")\n'
+                'set(CMAKE_MSVC_RUNTIME_LIBRARY "MultiThreaded$<$<CONFIG:Debug>:Debug>")\n'
+            )
+        elif system == "macos":
+            parts.append(
+                "# macOS: universal-capable configuration\n"
+                f'set(CMAKE_OSX_ARCHITECTURES "{self.system_info["arch"]}")\n'
+            )
+        else:
+            parts.append(
+                "# Linux: prefer static thirdparty libraries\n"
+                "set(CMAKE_POSITION_INDEPENDENT_CODE ON)\n"
+            )
+        parts.append("\n")
+
+        # Emit the package directories as a static list: file(GLOB) at
+        # configure time defeats CMake's dependency tracking and re-scans on
+        # every configure, and the setup script already knows the exact set.
+        parts.append("# Make the per-platform packages visible to find_package\n")
+        platform_root = self.thirdparty_dir / platform_dir
+        pkg_dirs = []
+        if platform_root.is_dir():
+            with os.scandir(platform_root) as it:
+                pkg_dirs = sorted(e.name for e in it
+                                  if e.is_dir(follow_symlinks=False))
+        for name in pkg_dirs:
+            parts.append(
+                f'list(APPEND CMAKE_PREFIX_PATH "${{PLATFORM_DIR}}/{name}")\n')
+        parts.append("\n")
+
+        if not self.no_qt:
+            parts.append(
+                "# Qt\n"
+                'if(EXISTS "${CMAKE_CURRENT_SOURCE_DIR}/thirdparty/qt")\n'
+                '    list(APPEND CMAKE_PREFIX_PATH "${CMAKE_CURRENT_SOURCE_DIR}/thirdparty/qt")\n'
+                "endif()\n"
+            )
+
+        config_bytes = "".join(parts).encode("utf-8")
+        config_file = self.root_dir / "cmake" / "PlatformConfig.cmake"
+        config_file.parent.mkdir(exist_ok=True)
+        # Rewriting an identical config bumps its mtime and triggers a full
+        # CMake reconfigure downstream.
+        if config_file.exists() and config_file.read_bytes() == config_bytes:
+            print(f"[OK] {config_file.name} unchanged")
+            return True
+        config_file.write_bytes(config_bytes)
+        print(f"[OK] Generated {config_file}")
+        return True
+
+    def create_build_scripts(self):
+        """Write the convenience build scripts for this platform."""
+        if self.system_info["system"] == "windows":
+            script_file = self.root_dir / "build.bat"
+            script_content = (
+                "@echo off\r\n"
+                "cmake -B build -S . -DCMAKE_BUILD_TYPE=Release\r\n"
+                "cmake --build build --config Release\r\n"
+            )
+        else:
+            script_file = self.root_dir / "build.sh"
+            script_content = (
+                "#!/bin/bash\n"
+                "set -e\n"
+                "cmake -B build -S . -DCMAKE_BUILD_TYPE=Release\n"
+                "cmake --build build --config Release\n"
+            )
+        new = script_content.encode()
+        # Leave the script untouched when it is already up to date so its
+        # mtime does not invalidate anything downstream.
+        if script_file.exists() and script_file.read_bytes() == new:
+            print(f"[OK] {script_file.name} up to date")
+            return True
+        # Create with the execute bit in the same syscall as the write.
+        fd = os.open(str(script_file), os.O_CREAT | os.O_WRONLY | os.O_TRUNC,
+                     0o755)
+        try:
+            os.write(fd, new)
+        finally:
+            os.close(fd)
+        print(f"[OK] Created {script_file.name}")
+        return True
+
+    def _cmake_config_key(self, use_ninja):
+        """Digest of everything that affects CMake generation."""
+        digest = hashlib.blake2b(digest_size=16)
+        for path in (self.root_dir / "CMakeLists.txt",
+                     self.root_dir / "cmake" / "PlatformConfig.cmake"):
+            try:
+                digest.update(path.read_bytes())
+            except OSError:
+                digest.update(b"<missing>")
+        digest.update(self.system_info["triplet"].encode())
+        digest.update(b"ninja" if use_ninja else b"default")
+        return digest.hexdigest()
+
+    def run_initial_build(self):
+        """Configure and run the first build of the engine."""
+        if self.skip_build:
+            print("[INFO] Skipping initial build (--skip-build)")
+            return True
+        build_dir = self.root_dir / "build"
+        jobs = os.cpu_count() or 4
+        # Ninja's DAG scheduling saturates cores better than Make/MSBuild.
+        use_ninja = self._check_command_exists("ninja")
+        # Reconfiguring costs tens of seconds; skip it when the generation
+        # inputs are byte-identical to what the existing cache was built
+        # from.
+        key_file = build_dir / ".lupine_config_key"
+        config_key = self._cmake_config_key(use_ninja)
+        configured = False
+        if not self.force and (build_dir / "CMakeCache.txt").exists():
+            try:
+                configured = key_file.read_text() == config_key
+            except OSError:
+                pass
+        if configured:
+            print("[OK] CMake configuration up to date")
+        else:
+            configure_cmd = ["cmake", "-B", str(build_dir),
+                             "-S", str(self.root_dir),
+                             "-DCMAKE_BUILD_TYPE=Release"]
+            if use_ninja:
+                configure_cmd += ["-G", "Ninja"]
+            print("[INFO] Configuring CMake...")
+            if not self._run_command(configure_cmd, check=False,
+                                     env=self._build_env):
+                print("[ERROR] CMake configure failed")
+                return False
+            key_file.write_text(config_key)
+        build_cmd = ["cmake", "--build", str(build_dir), "--config", "Release",
+                     "--parallel", str(jobs)]
+        if self.system_info["system"] == "windows" and not use_ninja:
+            # Let MSBuild parallelize across projects too when it is the
+            # underlying generator.
+            build_cmd += ["--", f"/m:{jobs}", "/nologo", "/verbosity:minimal"]
+        print("[INFO] Building (this can take a while)...")
+        if not self._run_command(build_cmd, check=False, env=self._build_env):
+            print("[ERROR] Build failed")
+            return False
+        print("[OK] Initial build complete")
+        return True
+
+    # ------------------------------------------------------------------
+    # Verification
+    # ------------------------------------------------------------------
+
+    def verify_dependencies(self):
+        """Verify the tools and libraries needed for a build are present."""
+        required_tools = ["cmake", "git"]
+        if self.system_info["system"] == "linux":
+            required_tools += ["gcc", "g++", "pkg-config"]
+        elif self.system_info["system"] == "macos":
+            required_tools += ["clang", "brew"]
+
+        # Resolve all tools in one pass over PATH: one directory listing per
+        # PATH entry instead of a full PATH walk per tool.
+        wanted = set(required_tools)
+        found = set()
+        exts = (".exe", ".bat", ".cmd") if self.system_info["system"] == "windows" else ()
+        for path_entry in self._path_entries:
+            try:
+                names = os.listdir(path_entry)
+            except OSError:
+                continue
+            for name in names:
+                stem = name
+                for ext in exts:
+                    if name.lower().endswith(ext):
+                        stem = name[:-len(ext)]
+                        break
+                if stem in wanted:
+                    found.add(stem)
+            if found == wanted:
+                break
+        missing = sorted(wanted - found)
+        if missing:
+            print(f"[ERROR] Missing tools: {', '.join(missing)}")
+            return False
+
+        if not self.no_qt and self.existing_qt is None:
+            # One listing answers all three exists() questions at once.
+            try:
+                with os.scandir(self.thirdparty_dir / "qt") as entries:
+                    names = {e.name for e in entries}
+            except OSError:
+                names = set()
+            if not {"include", "lib"} <= names:
+                print("[WARN] Qt installation not verified")
+
+        print("[OK] Dependency verification passed")
+        return True
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Set up the Lupine Engine build environment")
+    parser.add_argument("--force", action="store_true",
+                        help="Reinstall dependencies even if present")
+    parser.add_argument("--no-qt", action="store_true",
+                        help="Skip Qt setup (runtime-only builds)")
+    parser.add_argument("--verify-only", action="store_true",
+                        help="Only verify the environment, install nothing")
+    parser.add_argument("--skip-build", action="store_true",
+                        help="Skip the initial CMake build")
+    parser.add_argument("--cross-libs", action="store_true",
+                        help="Also fetch precompiled libraries for every "
+                             "export target platform")
+    args = parser.parse_args()
+
+    setup = BuildEnvironmentSetup(force=args.force, no_qt=args.no_qt,
+                                  skip_build=args.skip_build,
+                                  cross_libs=args.cross_libs)
+
+    if args.verify_only:
+        sys.exit(0 if setup.verify_dependencies() else 1)
+
+    if setup.setup_cache_is_current():
+        print("[OK] Build environment up-to-date (use --force to redo setup)")
+        sys.exit(0)
+
+    setup.prefetch_repositories()
+    # System dependencies and the Emscripten SDK are independent network-bound
+    # tasks, so overlap them; Qt setup has to wait for the system packages.
+    # The directory layout, export manifest and build scripts have static
+    # content that depends on nothing the installs produce, so they ride
+    # along in the same pool and their seconds disappear inside the
+    # minutes-long installs. generate_cmake_config stays sequential: it
+    # scans the package dirs the installs populate.
+    with ThreadPoolExecutor(max_workers=3) as executor:
+        deps_future = executor.submit(setup.install_system_dependencies)
+        emsdk_future = executor.submit(setup.setup_emscripten)
+
+        def static_outputs():
+            setup.setup_cross_platform_libraries()
+            setup._setup_export_libraries()
+            setup.create_build_scripts()
+
+        static_future = executor.submit(static_outputs)
+        if not deps_future.result():
+            print("[WARN] Some system dependencies could not be installed")
+        if not setup.setup_qt():
+            print("[WARN] Qt setup incomplete - editor build may fail")
+        if not emsdk_future.result():
+            print("[WARN] Emscripten setup incomplete - web export unavailable")
+        static_future.result()
+    setup.generate_cmake_config()
+    # Export-target libraries are only needed for cross-platform export
+    # builds, so they are opt-in rather than part of every setup.
+    if args.cross_libs and not setup.setup_cross_compilation_libraries():
+        print("[WARN] Some export-target libraries could not be fetched")
+    if not setup.verify_dependencies():
+        sys.exit(1)
+    if not setup.run_initial_build():
+        sys.exit(1)
+    setup.write_setup_cache()
+    print("[OK] Build environment setup complete")
+
+
+if __name__ == "__main__":
+    main()